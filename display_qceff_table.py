@@ -3,35 +3,206 @@
 # SPDX-License-Identifier: Apache-2.0
 """
 Script to read and pretty print QCEFF table information 
+
+The work here is reading a small CSV file and formatting strings, so it
+is not a candidate for Numba or other JIT compilation: there are no
+numeric loops to compile, and the compile time would outweigh any saving
+for a short-lived script. Keep it fast by cutting down per-row Python
+work, the number of writes to stdout and the number of file reads.
 """
 
-import csv
+import functools
+import io
+import mmap
+import operator
+import os
 import sys
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Any
+
+
+_USAGE = "usage: {prog} [-h] [--details] csv_file"
+
+_HELP = """Display QCEFF table summary and details.
+
+positional arguments:
+  csv_file    Path to QCEFF table CSV file
+
+options:
+  -h, --help  show this help message and exit
+  --details   Print detailed information for each quantity
+"""
+
+# Read buffer for the CSV file, larger than the 8 KiB default to cut
+# down on read calls for big tables
+_READ_BUFFER_SIZE = 256 * 1024
+
+# Encoding of QCEFF table files, used whichever way the file is read
+_ENCODING = 'utf-8'
+
+# Files larger than this are memory mapped rather than read line by line,
+# below it the cost of setting up the mapping is not worth it
+_MMAP_THRESHOLD = 64 * 1024
+
+# Number of columns in a qceff table v1 data row
+_ROW_WIDTH = 25
+
+# Values used for missing trailing columns in the summary table,
+# distribution and filter kind columns show N/A, bounds are left blank
+_ROW_DEFAULTS = ['', '', '', '', '',
+                 'N/A', '', '', '', '',
+                 'N/A', '', '', '', '',
+                 'N/A', '', '', '', '',
+                 'N/A', '', '', '', '']
+
+# Getter for the columns shown in the detailed information
+_QTY_COLS = operator.itemgetter(*range(1, _ROW_WIDTH))
+
+# First column of each group in a qceff table v1 row, each group is
+# (dist type or filter kind, bounded below, bounded above, lower, upper)
+# probit_inflation, probit_state, probit_extended_state
+_PROBIT_COLS = (5, 10, 15)
+# obs_inc_info
+_OBS_INC_COL = 20
+
+# Values of the bounded below/above columns that mean the side is bounded,
+# compared after stripping and upper casing (so .true., t, True all match)
+_TRUE_TOKENS = frozenset({'TRUE', '.TRUE.', 'T'})
+
+# Values of the lower/upper bound columns that mean there is no bound,
+# compared after stripping and upper casing
+_NONE_TOKENS = frozenset({'', 'NONE', '-888888'})
+
+# Separator lines for the detailed information and the summary table
+_SEP80 = '=' * 80
+_SEP154 = '=' * 154
+
+# One line of the summary table
+_SUMMARY_FMT = "{:<30} {:<30} {:<30} {:<30} {:<30}\n".format
+
+# Underline for the summary table column headers
+_SUMMARY_DASHES = _SUMMARY_FMT(*['-' * 30] * 5)
+
+# Detailed per-quantity block, {0} is the quantity name and {1}..{24}
+# are the columns of the row in qceff table v1 order
+_QTY_TEMPLATE = (
+    "\n{sep}\n"
+    "QUANTITY: {{0}}\n"
+    "{sep}\n"
+    # obs_error_info
+    "\nOBS ERROR INFO:\n"
+    "  Bounded Below: {{1}}\n"
+    "  Bounded Above: {{2}}\n"
+    "  Lower Bound:   {{3}}\n"
+    "  Upper Bound:   {{4}}\n"
+    # probit_inflation
+    "\nPROBIT INFLATION:\n"
+    "  Dist Type:     {{5}}\n"
+    "  Bounded Below: {{6}}\n"
+    "  Bounded Above: {{7}}\n"
+    "  Lower Bound:   {{8}}\n"
+    "  Upper Bound:   {{9}}\n"
+    # probit_state
+    "\nPROBIT STATE:\n"
+    "  Dist Type:     {{10}}\n"
+    "  Bounded Below: {{11}}\n"
+    "  Bounded Above: {{12}}\n"
+    "  Lower Bound:   {{13}}\n"
+    "  Upper Bound:   {{14}}\n"
+    # probit_extended_state
+    "\nPROBIT EXTENDED STATE:\n"
+    "  Dist Type:     {{15}}\n"
+    "  Bounded Below: {{16}}\n"
+    "  Bounded Above: {{17}}\n"
+    "  Lower Bound:   {{18}}\n"
+    "  Upper Bound:   {{19}}\n"
+    # obs_inc_info
+    "\nOBS INC INFO:\n"
+    "  Filter Kind:   {{20}}\n"
+    "  Bounded Below: {{21}}\n"
+    "  Bounded Above: {{22}}\n"
+    "  Lower Bound:   {{23}}\n"
+    "  Upper Bound:   {{24}}\n"
+).format(sep=_SEP80).format
+
+
+def _split_line(line: str) -> List[str]:
+    """
+    Split one line of a QCEFF table into its columns.
+
+    QCEFF tables are plain comma separated values, so lines are split
+    directly on commas. Any line containing a quote is left to the csv
+    module instead.
+
+    The same few values (TRUE, FALSE, -888888, distribution names) repeat
+    down every column, so each value is interned and all the rows share
+    one string object per distinct value.
+    """
+    if '"' in line:
+        # csv is only needed for quoted fields, so only import it then
+        import csv
+        columns = next(csv.reader([line]))
+    else:
+        columns = line.rstrip('\r\n').split(',')
+    return list(map(sys.intern, columns))
+
+
+def _stream_rows(file) -> Iterator[List[str]]:
+    """
+    Yield the rows of a QCEFF table file, closing it once exhausted.
+    """
+    with file:
+        yield from map(_split_line, file)
+
+
+def _mapped_rows(filename: str) -> Iterator[List[str]]:
+    """
+    Yield the rows of a large QCEFF table file, read in one go via mmap.
+    """
+    with open(filename, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # decode straight from the mapping, without a bytes copy
+            text = str(mm, _ENCODING)
+
+    # splits on \n, \r\n and a lone \r, like the newline='' stream path
+    yield from map(_split_line, text.splitlines())
 
 
 def read_qceff_table(filename: str) -> Dict[str, Any]:
     """
     Read the QCEFF table CSV file and parse its contents.
+
+    The version and column headers are read straight away, the data rows
+    are streamed from the file as they are consumed. Files larger than
+    _MMAP_THRESHOLD are memory mapped and read in one go instead.
     
     Args:
         filename: Path to the CSV file
         
     Returns:
-        Dictionary containing parsed table data
+        Dictionary containing parsed table data, 'data' is an iterator
+        over the data rows which can only be consumed once
     """
-    with open(filename, 'r') as file:
-        reader = csv.reader(file)
-        rows = list(reader)
+    if os.stat(filename).st_size > _MMAP_THRESHOLD:
+        rows = _mapped_rows(filename)
+    else:
+        file = open(filename, 'r', buffering=_READ_BUFFER_SIZE,
+                    encoding=_ENCODING, newline='')
+        rows = _stream_rows(file)
+
+    try:
+        # Header
+        version_info = next(rows)[0]  # "QCEFF table version: X"
+
+        # column headers 1 in qceff table v1
+        headers = next(rows)
+    except StopIteration:
+        raise ValueError("missing QCEFF table version or column headers")
+    except BaseException:
+        rows.close()
+        raise
 
-    # Header
-    version_info = rows[0][0]  # "QCEFF table version: X"
-    
-    # column headers 1 in qceff table v1
-    headers = rows[1]
-    
     # data rows
-    data_rows = rows[2:]
+    data_rows = rows
     
     return {
         'version': version_info,
@@ -40,231 +211,267 @@ def read_qceff_table(filename: str) -> Dict[str, Any]:
     }
 
 
-def display_quantity_info(qty_name: str, row: List[str]) -> None:
+def display_quantity_info(qty_name: str, row: List[str], out: TextIO) -> None:
     """
     Display information for a single quantity in a nicely formatted way.
     
     Args:
         qty_name: Name of the quantity
         row: Row data from CSV
+        out: Text stream to write to
     """
-    print(f"\n{'='*80}")
-    print(f"QUANTITY: {qty_name}")
-    print(f"{'='*80}")
-    
-    # obs_error_info
-    print(f"\nOBS ERROR INFO:")
-    print(f"  Bounded Below: {row[1]}")
-    print(f"  Bounded Above: {row[2]}")
-    print(f"  Lower Bound:   {row[3]}")
-    print(f"  Upper Bound:   {row[4]}")
+    out.write(_QTY_TEMPLATE(qty_name, *_QTY_COLS(row)))
 
-    # probit_inflation
-    print(f"\nPROBIT INFLATION:")
-    print(f"  Dist Type:     {row[5]}")
-    print(f"  Bounded Below: {row[6]}")
-    print(f"  Bounded Above: {row[7]}")
-    print(f"  Lower Bound:   {row[8]}")
-    print(f"  Upper Bound:   {row[9]}")
 
-    # probit_state
-    print(f"\nPROBIT STATE:")
-    print(f"  Dist Type:     {row[10]}")
-    print(f"  Bounded Below: {row[11]}")
-    print(f"  Bounded Above: {row[12]}")
-    print(f"  Lower Bound:   {row[13]}")
-    print(f"  Upper Bound:   {row[14]}")
+@functools.lru_cache(maxsize=64)
+def _short_dist(dist):
+    """
+    Shorten a distribution name for the summary table.
+    """
+    # Shorten BOUNDED_NORMAL_RH_DISTRIBUTION
+    dist = dist.replace('BOUNDED_NORMAL_RH_DISTRIBUTION', 'BNRH_DISTRIBUTION')
 
-    # probit_extended_state
-    print(f"\nPROBIT EXTENDED STATE:")
-    print(f"  Dist Type:     {row[15]}")
-    print(f"  Bounded Below: {row[16]}")
-    print(f"  Bounded Above: {row[17]}")
-    print(f"  Lower Bound:   {row[18]}")
-    print(f"  Upper Bound:   {row[19]}")
+    # Truncate long names
+    return dist[:18] + '..' if len(dist) > 20 else dist
+
+
+def _format_bounds(bounded_below, bounded_above, lower, upper):
+    """
+    Format bounds as an interval, closed on the sides that are bounded.
+    """
+    left_bracket = '[' if bounded_below.strip().upper() in _TRUE_TOKENS else '('
+    right_bracket = ']' if bounded_above.strip().upper() in _TRUE_TOKENS else ')'
+    # Handle inf/-inf
+    lower_str = lower.strip()
+    upper_str = upper.strip()
+    if lower_str.upper() in _NONE_TOKENS:
+        lower_str = '-inf'
+    if upper_str.upper() in _NONE_TOKENS:
+        upper_str = 'inf'
+    return f"{left_bracket}{lower_str},{upper_str}{right_bracket}"
+
+
+@functools.lru_cache(maxsize=256)
+def format_dist(dist, bounded_below, bounded_above, lower, upper):
+    """
+    Format a probit distribution, with bounds if appropriate.
+    """
+    dist_short = _short_dist(dist)
+    # If normal_distribution, do not show bounds
+    if dist.strip().upper() == 'NORMAL_DISTRIBUTION':
+        return dist_short
+    return f"{dist_short} {_format_bounds(bounded_below, bounded_above, lower, upper)}"
+
+
+@functools.lru_cache(maxsize=256)
+def format_kind(kind, bounded_below, bounded_above, lower, upper):
+    """
+    Format the filter kind for obs_inc_info, with bounds if appropriate.
+    """
+    kind_short = kind[:18] + '..' if len(kind) > 20 else kind
+    kind_upper = kind.strip().upper()
+    # EAKF: no bounds
+    if kind_upper == 'EAKF':
+        return kind_short
+    if kind_upper == 'BOUNDED_NORMAL_RHF':
+        return f"{kind_short} {_format_bounds(bounded_below, bounded_above, lower, upper)}"
+    if kind_upper == 'KDE_DISTRIBUTION':
+        return f"{kind_short} {_format_bounds(bounded_below, bounded_above, lower, upper)}"
+    # GAMMA_DISTRIBUTION: lower bound at 0
+    if kind_upper == 'GAMMA_DISTRIBUTION':
+        return f"{kind_short} [0,inf)"
+    # BETA_DISTRIBUTION: [0,1]
+    if kind_upper == 'BETA_DISTRIBUTION':
+        return f"{kind_short} [0,1]"
+    # LOG_NORMAL_DISTRIBUTION: lower bound at 0
+    if kind_upper == 'LOG_NORMAL_DISTRIBUTION':
+        return f"{kind_short} [0,inf)"
+    # UNIFORM_DISTRIBUTION: use bounds if available
+    if kind_upper == 'UNIFORM_DISTRIBUTION':
+        return kind_short
+    # Default: just the kind name
+    return kind_short
+
+
+def _pad_row(row: List[str]) -> List[str]:
+    """
+    Fill in any missing trailing columns, so the row has the full
+    qceff table v1 width.
+    """
+    width = len(row)
+    if width < _ROW_WIDTH:
+        return row + _ROW_DEFAULTS[width:]
+    return row
 
-    # obs_inc_info
-    print(f"\nOBS INC INFO:")
-    print(f"  Filter Kind:   {row[20]}")
-    print(f"  Bounded Below: {row[21]}")
-    print(f"  Bounded Above: {row[22]}")
-    print(f"  Lower Bound:   {row[23]}")
-    print(f"  Upper Bound:   {row[24]}")
 
+def _make_summary_line():
+    """
+    Generate the summary line formatter for the qceff table v1 layout.
 
-def display_summary_table(data: List[List[str]]) -> None:
+    The column positions never change, so they are written straight into
+    the source of the generated function, with the formatters bound as
+    default arguments. Each row is then formatted with plain subscripts
+    and no tuple building or global lookups.
+    """
+    k = _OBS_INC_COL
+    dists = "".join(
+        f"        dist(row[{i}], row[{i + 1}], row[{i + 2}], row[{i + 3}], row[{i + 4}]),\n"
+        for i in _PROBIT_COLS)
+    src = (
+        "def _summary_line(row, fmt=_SUMMARY_FMT, dist=format_dist, kind=format_kind):\n"
+        "    \"\"\"Format one full width data row as a line of the summary table.\"\"\"\n"
+        f"    filter_kind = row[{k}]\n"
+        "    return fmt(\n"
+        "        row[0].removeprefix('QTY_'),\n"
+        f"{dists}"
+        "        kind(filter_kind + '..' if len(filter_kind) > 20 else filter_kind,\n"
+        f"             row[{k + 1}], row[{k + 2}], row[{k + 3}], row[{k + 4}]))\n"
+    )
+    namespace = {}
+    exec(src, globals(), namespace)
+    return namespace['_summary_line']
+
+
+_summary_line = _make_summary_line()
+
+
+def display_summary_table(data: Iterable[List[str]], out: TextIO,
+                          details: Optional[TextIO] = None) -> None:
 
     """
     Display a summary table of all quantities.
     
     Args:
-        data: List of data rows from CSV
+        data: Data rows from CSV
+        out: Text stream to write to
+        details: If given, text stream to write the detailed information
+            for each quantity to, built in the same pass over the data
     """
-    print(f"\n{'='*154}")
+    write = out.write
+    write(f"\n{_SEP154}\n")
     
     # Header
-    print(f"{'QUANTITY':<30} {'PROBIT_INFL':<30} {'PROBIT_STATE':<30} {'PROBIT_EXT':<30} {'FILTER_KIND':<30}")
+    write(_SUMMARY_FMT('QUANTITY', 'PROBIT_INFL', 'PROBIT_STATE', 'PROBIT_EXT', 'FILTER_KIND'))
     #print(f"{'':<30} {'distribution':<30} {'distribution':<30} {'distribution':<30} {'filter kind':<30}")
-    print(f"{'-'*30} {'-'*30} {'-'*30} {'-'*30} {'-'*30}")
-
-    def format_dist(dist, bounded_below, bounded_above, lower, upper):
-        # Shorten BOUNDED_NORMAL_RH_DISTRIBUTION
-        dist = dist.replace('BOUNDED_NORMAL_RH_DISTRIBUTION', 'BNRH_DISTRIBUTION')
-
-        # Truncate long names
-        dist_short = dist[:18] + '..' if len(dist) > 20 else dist
-        # If normal_distribution, do not show bounds
-        if dist.strip().upper() == 'NORMAL_DISTRIBUTION':
-            return dist_short
-        # Format bounds
-        if bounded_below.strip().upper() == 'TRUE' or bounded_below.strip() == '.true.':
-            left_bracket = '['
-        else:
-            left_bracket = '('
-        if bounded_above.strip().upper() == 'TRUE' or bounded_above.strip() == '.true.':
-            right_bracket = ']'
+    write(_SUMMARY_DASHES)
+
+    # Only pad data rows, blank lines (all columns empty) are skipped
+    rows = map(_pad_row, filter(any, data))
+    if details is None:
+        # No per-row work besides the summary line, let map drive the loop
+        out.writelines(map(_summary_line, rows))
+    else:
+        for row in rows:
+            write(_summary_line(row))
+            display_quantity_info(row[0], row, details)
+
+
+def _parse_args(argv: List[str]) -> Tuple[str, bool]:
+    """
+    Parse the command line arguments.
+
+    The script only takes a CSV file and a --details flag, so they are
+    picked out of argv directly rather than paying for argparse.
+
+    Args:
+        argv: Command line arguments, without the program name
+
+    Returns:
+        Tuple of (CSV file name, whether to print detailed information)
+    """
+    prog = os.path.basename(sys.argv[0])
+    usage = _USAGE.format(prog=prog)
+
+    details = False
+    csv_file = None
+    unrecognized = []
+
+    args = iter(argv)
+    for arg in args:
+        if arg == '--':
+            # Everything after -- is positional, e.g. a file named -x.csv
+            remaining = list(args)
+            if remaining and csv_file is None:
+                csv_file = remaining.pop(0)
+            unrecognized.extend(remaining)
+            break
+        if arg == '-h' or (len(arg) > 2 and '--help'.startswith(arg)):
+            sys.stdout.write(usage + "\n\n" + _HELP)
+            sys.exit(0)
+        if len(arg) > 2 and '--details'.startswith(arg):
+            details = True
+        elif (arg.startswith('-') and arg != '-') or csv_file is not None:
+            unrecognized.append(arg)
         else:
-            right_bracket = ')'
-        # Handle inf/-inf
-        lower_str = lower.strip()
-        upper_str = upper.strip()
-        if lower_str == '' or lower_str.lower() == 'none' or lower_str == '-888888':
-            lower_str = '-inf'
-        if upper_str == '' or upper_str.lower() == 'none' or upper_str == '-888888':
-            upper_str = 'inf'
-        return f"{dist_short} {left_bracket}{lower_str},{upper_str}{right_bracket}"
-
-    def format_kind(kind, bounded_below, bounded_above, lower, upper):
-            """
-            Format the filter kind for obs_inc_info, with bounds if appropriate.
-            """
-            kind_short = kind[:18] + '..' if len(kind) > 20 else kind
-            kind_upper = kind.strip().upper()
-            # EAKF: no bounds
-            if kind_upper == 'EAKF':
-                return kind_short
-            if kind_upper == 'BOUNDED_NORMAL_RHF':
-                # Format bounds
-                if bounded_below.strip().upper() == 'TRUE' or bounded_below.strip() == '.true.':
-                    left_bracket = '['
-                else:
-                    left_bracket = '('
-                if bounded_above.strip().upper() == 'TRUE' or bounded_above.strip() == '.true.':
-                    right_bracket = ']'
-                else:
-                    right_bracket = ')'
-                # Handle inf/-inf
-                lower_str = lower.strip()
-                upper_str = upper.strip()
-                if lower_str == '' or lower_str.lower() == 'none' or lower_str == '-888888':
-                    lower_str = '-inf'
-                if upper_str == '' or upper_str.lower() == 'none' or upper_str == '-888888':
-                    upper_str = 'inf'
-                return f"{kind_short} {left_bracket}{lower_str},{upper_str}{right_bracket}"
-            if kind_upper == 'KDE_DISTRIBUTION':
-                # Format bounds
-                if bounded_below.strip().upper() == 'TRUE' or bounded_below.strip() == '.true.':
-                    left_bracket = '['
-                else:
-                    left_bracket = '('
-                if bounded_above.strip().upper() == 'TRUE' or bounded_above.strip() == '.true.':
-                    right_bracket = ']'
-                else:
-                    right_bracket = ')'
-                # Handle inf/-inf
-                lower_str = lower.strip()
-                upper_str = upper.strip()
-                if lower_str == '' or lower_str.lower() == 'none' or lower_str == '-888888':
-                    lower_str = '-inf'
-                if upper_str == '' or upper_str.lower() == 'none' or upper_str == '-888888':
-                    upper_str = 'inf'
-                return f"{kind_short} {left_bracket}{lower_str},{upper_str}{right_bracket}"
-            # GAMMA_DISTRIBUTION: lower bound at 0
-            if kind_upper == 'GAMMA_DISTRIBUTION':
-                return f"{kind_short} [0,inf)"
-            # BETA_DISTRIBUTION: [0,1]
-            if kind_upper == 'BETA_DISTRIBUTION':
-                return f"{kind_short} [0,1]"
-            # LOG_NORMAL_DISTRIBUTION: lower bound at 0
-            if kind_upper == 'LOG_NORMAL_DISTRIBUTION':
-                return f"{kind_short} [0,inf)"
-            # UNIFORM_DISTRIBUTION: use bounds if available
-            if kind_upper == 'UNIFORM_DISTRIBUTION':
-                return kind_short
-            # Default: just the kind name
-            return kind_short
-
-
-    for row in data:
-        qty_name = row[0].replace('QTY_', '')
-        # Probit inflation
-        probit_infl_dist = row[5] if len(row) > 5 else 'N/A'
-        probit_infl_below = row[6] if len(row) > 6 else ''
-        probit_infl_above = row[7] if len(row) > 7 else ''
-        probit_infl_low = row[8] if len(row) > 8 else ''
-        probit_infl_up = row[9] if len(row) > 9 else ''
-        probit_infl = format_dist(probit_infl_dist, probit_infl_below, probit_infl_above, probit_infl_low, probit_infl_up)
-
-        # Probit state
-        probit_state_dist = row[10] if len(row) > 10 else 'N/A'
-        probit_state_below = row[11] if len(row) > 11 else ''
-        probit_state_above = row[12] if len(row) > 12 else ''
-        probit_state_low = row[13] if len(row) > 13 else ''
-        probit_state_up = row[14] if len(row) > 14 else ''
-        probit_state = format_dist(probit_state_dist, probit_state_below, probit_state_above, probit_state_low, probit_state_up)
-
-        # Probit extended state
-        probit_ext_dist = row[15] if len(row) > 15 else 'N/A'
-        probit_ext_below = row[16] if len(row) > 16 else ''
-        probit_ext_above = row[17] if len(row) > 17 else ''
-        probit_ext_low = row[18] if len(row) > 18 else ''
-        probit_ext_up = row[19] if len(row) > 19 else ''
-        probit_ext = format_dist(probit_ext_dist, probit_ext_below, probit_ext_above, probit_ext_low, probit_ext_up)
-
-        filter_kind = row[20] + '..' if len(row[20]) > 20 else row[20]
-        obs_inc_below = row[21] if len(row) > 21 else ''
-        obs_inc_above = row[22] if len(row) > 22 else ''
-        obs_inc_low = row[23] if len(row) > 23 else ''
-        obs_inc_up = row[24] if len(row) > 24 else ''
-        obs_inc_info = format_kind(filter_kind, obs_inc_below, obs_inc_above, obs_inc_low, obs_inc_up)
-
-        print(f"{qty_name:<30} {probit_infl:<30} {probit_state:<30} {probit_ext:<30} {obs_inc_info:<30}")
+            csv_file = arg
+
+    if csv_file is None:
+        error = "the following arguments are required: csv_file"
+    elif unrecognized:
+        error = f"unrecognized arguments: {' '.join(unrecognized)}"
+    else:
+        return csv_file, details
+
+    sys.stderr.write(f"{usage}\n{prog}: error: {error}\n")
+    sys.exit(2)
+
+
+def _write_report(report: str) -> None:
+    """
+    Write the whole report to stdout with as few write calls as possible.
+
+    The report is encoded once and written straight to the stdout file
+    descriptor, bypassing the text layer of sys.stdout. Falls back to
+    sys.stdout.write when stdout has no file descriptor.
+    """
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        sys.stdout.write(report)
+        return
+
+    # Anything already written through sys.stdout must come first
+    sys.stdout.flush()
+
+    data = memoryview(report.encode(sys.stdout.encoding or 'utf-8',
+                                    sys.stdout.errors or 'strict'))
+    while data:
+        data = data[os.write(fd, data):]
 
 
 def main():
     """Main function to run the script."""
-    import argparse
-    parser = argparse.ArgumentParser(description="Display QCEFF table summary and details.")
-    parser.add_argument("csv_file", help="Path to QCEFF table CSV file")
-    parser.add_argument("--details", action="store_true", help="Print detailed information for each quantity")
-    args = parser.parse_args()
-
-    filename = args.csv_file
+    filename, show_details = _parse_args(sys.argv[1:])
 
     try:
         # Read the CSV file
         table_data = read_qceff_table(filename)
 
-        print(f"File: {filename}")
-        print(f"Version: {table_data['version']}")
+        # Collect the whole report and write it out once at the end
+        out = io.StringIO()
+        write = out.write
+        write(f"File: {filename}\n")
+        write(f"Version: {table_data['version']}\n")
 
-        # Display summary table first
-        display_summary_table(table_data['data'])
+        # Summary and detailed information are built in a single pass
+        # over the data rows, the details are displayed after the summary
+        details = io.StringIO() if show_details else None
+        display_summary_table(table_data['data'], out, details)
 
-        if args.details:
+        if show_details:
             # Display detailed information for each quantity
-            print(f"\n{'='*80}")
-            print("DETAILED INFORMATION")
-            print(f"{'='*80}")
+            write(f"\n{_SEP80}\n")
+            write("DETAILED INFORMATION\n")
+            write(f"{_SEP80}\n")
 
-            for row in table_data['data']:
-                qty_name = row[0]
-                display_quantity_info(qty_name, row)
+            write(details.getvalue())
 
-            print(f"\n{'='*80}")
-            print("END OF REPORT")
+            write(f"\n{_SEP80}\n")
+            write("END OF REPORT\n")
             
-        print(f"{'='*154}")
+        write(f"{_SEP154}\n")
+
+        _write_report(out.getvalue())
 
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")